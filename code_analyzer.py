@@ -12,7 +12,8 @@ The program does not force the names of
 variables outside of functions (for example, in modules or classes).
 This realized with the AST from the ast module.
 
-Scrypt takes path to file as argument.
+Scrypt takes path to file or folder as argument.
+Folders are searched for .py files recursively.
 Example:
 python code_analyzer.py my_module.py
 
@@ -34,18 +35,49 @@ Issues that can be found:
 
 """
 
-import argparse
+import array
 import os
 import re
-import ast
+import sys
+from collections import defaultdict
+from itertools import groupby
 from pathlib import Path
 
+# one optional character other than '#', ASCII or a whole UTF-8 sequence
+_NOT_HASH = rb'(?:[^#\x80-\xff]|[\xc0-\xff][\x80-\xbf]{1,3})?'
+_DEF_OR_CLASS = re.compile(_NOT_HASH + rb' *_?_?(?:def|class) ')
+_DEF_SPACES = re.compile(_NOT_HASH + rb' *_?_?def {2,}')
+_CLASS_SPACES = re.compile(_NOT_HASH + rb' *class {2,}')
+_CLASS_LOWER = re.compile(rb' *class +[a-z]')
+_CLASS_UNDER = re.compile(rb' *class +[a-zA-z]+_')
+_FUNC_CAMEL = re.compile(rb' *def +[a-z0-9_]*[A-Z]')
+
+
+# fields that hold statement lists, the only place FunctionDef and Assign occur
+_STMT_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+_SKIP_DIRS = {'.git', '__pycache__', '.venv'}
+
+
+def _not_snake(name):
+    return name.lower() != name
+
+
+def _issue_columns():
+    # line numbers and codes of one file's issues, kept as parallel columns
+    return array.array('I'), []
+
+
+def _line_length(line):
+    if line.isascii():
+        return len(line)
+    return len(line.decode('utf-8', 'replace'))
+
 
 class CodeAnalyzer:
     def __init__(self, input_path):
         self.input_path = input_path
-        self.preceding_blank_lines = 0
         self.current_path = ''
+        self._cur_key = ''
         self.issues = {'S001': 'Too long',
                        'S002': 'Indentation is not a multiple of four',
                        'S003': 'Unnecessary semicolon after a statement',
@@ -59,152 +91,139 @@ class CodeAnalyzer:
                        'S011': 'Variable var_name should be written in snake_case',
                        'S012': 'The default argument value is mutable'
                        }
-        self.result = {}
+        self._suffix = {code: f'{code} {message}'
+                        for code, message in self.issues.items()}
+        self.result = defaultdict(_issue_columns)
 
     def output(self, line_number, code):
-        try:
-            self.result[str(self.current_path)].append((line_number, code))
-        except KeyError:
-            self.result[str(self.current_path)] = [(line_number, code)]
-
-    def len_check(self, line, line_number):
-        code = 'S001'
-        if len(line.rstrip('\n')) > 79:
-            self.output(line_number, code)
-
-    def ident_check(self, line, line_number):
-        code = 'S002'
-        ident_counter = 0
-        for letter in line:
-            if letter != ' ':
-                break
-            ident_counter += 1
-        if ident_counter > 0 and (ident_counter % 4) != 0:
-            self.output(line_number, code)
-
-    def semicolon_check(self, line, line_number):
-        code = 'S003'
-        line = line.split('#')
-        line = line[0].rstrip()
-        if len(line) > 0:
-            if line[-1] == ';':
-                self.output(line_number, code)
-
-    def two_spaces_check(self, line, line_number):
-        code = 'S004'
-        if line[0] == '#':
-            return None
-        line = line.split('#')
-        if len(line) > 1 and line[0][-2:] != '  ':
-            self.output(line_number, code)
-
-    def todo_check(self, line, line_number):
-        code = 'S005'
-        line = line.split('#')
-        if len(line) > 1:
-            del line[0]
-            for part in line:
-                if 'todo' in part.lower():
-                    self.output(line_number, code)
-                    break
-
-    def blank_lines_check(self, line, line_number):
-        code = 'S006'
-        if line.rstrip('\n') == '':
-            self.preceding_blank_lines += 1
-            return None
-        if self.preceding_blank_lines > 2:
-            self.preceding_blank_lines = 0
-            self.output(line_number, code)
-        elif 0 < self.preceding_blank_lines <= 2:
-            self.preceding_blank_lines = 0
-
-    def def_spaces_check(self, line, line_number):
-        code = 'S007'
-        def_template = r'[^#]? *_?_?def {2,}'
-        class_template = r'[^#]? *class {2,}'
-        if re.match(def_template, line) or re.match(class_template, line):
-            self.output(line_number, code)
-
-    def class_naming_check(self, line, line_number):
-        code = 'S008'
-        lwrcase_template = r' *class +[a-z]'
-        undscr_template = r' *class +[a-zA-z]+_'
-        if re.match(lwrcase_template, line) or re.match(undscr_template, line):
-            self.output(line_number, code)
-
-    def function_naming_check(self, line, line_number):
-        code = 'S009'
-        template = r' *def +[a-z0-9_]*[A-Z]'
-        if re.match(template, line):
-            self.output(line_number, code)
-
-    def arguments_check(self, file_path):
-        template = r'.*[A-Z]'
-        file = open(file_path).read()
-        tree = ast.parse(file)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                mutable_found = False
-                args = [a.arg for a in node.args.args]
-                args_default = [a for a in node.args.defaults]
-                # check if arg in snake_case
-                for arg in args:
-                    if re.match(template, arg):
-                        self.output(node.lineno, 'S010')
-                # check if def arg is mutable:
-                for def_arg in args_default:
-                    if not mutable_found:
-                        mutable_found = True
-                        if type(def_arg).__name__ != 'Constant':
-                            self.output(node.lineno, 'S012')
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    try:
-                        target.__dict__['id']
-                    except KeyError:
-                        pass
-                    else:
-                        if re.match(template, target.__dict__['id']):
-                            self.output(node.lineno, 'S011')
-
-    def check_file(self, file_path):
-        with open(file_path) as file:
-            line_number = 1
-            for line in file:
-                # line_stripped = line.rstrip('\n')
-                self.len_check(line, line_number)
-                self.ident_check(line, line_number)
-                self.semicolon_check(line, line_number)
-                self.two_spaces_check(line, line_number)
-                self.todo_check(line, line_number)
-                self.blank_lines_check(line, line_number)
-                self.def_spaces_check(line, line_number)
-                self.class_naming_check(line, line_number)
-                self.function_naming_check(line, line_number)
-                line_number += 1
-        self.arguments_check(file_path)
+        lines, codes = self.result[self._cur_key]
+        lines.append(line_number)
+        codes.append(code)
+
+    def function_check(self, node):
+        mutable_found = False
+        args = [a.arg for a in node.args.args]
+        args_default = [a for a in node.args.defaults]
+        # check if arg in snake_case
+        for arg in args:
+            if _not_snake(arg):
+                self.output(node.lineno, 'S010')
+        # check if def arg is mutable:
+        for def_arg in args_default:
+            if not mutable_found:
+                mutable_found = True
+                if type(def_arg).__name__ != 'Constant':
+                    self.output(node.lineno, 'S012')
+
+    def assignment_check(self, node, name_type):
+        for target in node.targets:
+            if type(target) is name_type and _not_snake(target.id):
+                self.output(node.lineno, 'S011')
+
+    def arguments_check(self, source):
+        import ast
+        function_type, assign_type, name_type = (
+            ast.FunctionDef, ast.Assign, ast.Name)
+        stack = [ast.parse(source)]
+        while stack:
+            node = stack.pop()
+            node_type = type(node)
+            if node_type is function_type:
+                self.function_check(node)
+            elif node_type is assign_type:
+                self.assignment_check(node, name_type)
+                continue
+            for field in _STMT_FIELDS:
+                stack.extend(getattr(node, field, ()))
+
+    def check_file(self, source):
+        blank_lines = bytearray()
+        for line_number, line in enumerate(source.splitlines(), 1):
+            hash_idx = line.find(b'#')
+            code_part = line[:hash_idx] if hash_idx >= 0 else line
+            indent = len(line) - len(line.lstrip(b' '))
+            # S001 - S005
+            if len(line) > 79 and _line_length(line) > 79:
+                self.output(line_number, 'S001')
+            if indent & 3:
+                self.output(line_number, 'S002')
+            if code_part.rstrip().endswith(b';'):
+                self.output(line_number, 'S003')
+            if hash_idx > 0 and not line.endswith(b'  ', 0, hash_idx):
+                self.output(line_number, 'S004')
+            if hash_idx >= 0 and line.lower().find(b'todo', hash_idx + 1) >= 0:
+                self.output(line_number, 'S005')
+            if not line:
+                blank_lines.append(1)
+                continue
+            blank_lines.append(0)
+            # S007 - S009
+            if not _DEF_OR_CLASS.match(line):
+                continue
+            if _DEF_SPACES.match(line) or _CLASS_SPACES.match(line):
+                self.output(line_number, 'S007')
+            if _CLASS_LOWER.match(line) or _CLASS_UNDER.match(line):
+                self.output(line_number, 'S008')
+            if _FUNC_CAMEL.match(line):
+                self.output(line_number, 'S009')
+        # S006
+        line_number = 1
+        for is_blank, run in groupby(blank_lines):
+            run_length = len(list(run))
+            line_number += run_length
+            if is_blank and run_length > 2 and line_number <= len(blank_lines):
+                self.output(line_number, 'S006')
 
     def check_path(self):
-        if os.path.isfile(self.input_path):
-            self.current_path = Path(self.input_path)
-            self.check_file(self.current_path)
+        basepath = Path(self.input_path)
+        if basepath.is_file():
+            self.check_one(basepath)
         else:
-            basepath = Path(self.input_path)
-            files = (entry for entry in basepath.iterdir() if entry.is_file())
-            for file in files:
-                if file.name.endswith('.py'):
-                    self.current_path = file
-                    self.check_file(file)
+            from concurrent.futures import ProcessPoolExecutor
+            # os.scandir raises for paths that are missing or not a directory
+            files = _find_py_files(basepath, [])
+            with ProcessPoolExecutor() as executor:
+                for file, (lines, codes) in executor.map(_analyze_one, files):
+                    if codes:
+                        self.result[str(file)] = lines, codes
+
+    def check_one(self, file_path):
+        self.current_path = file_path
+        self._cur_key = str(file_path)
+        self.check_current()
+
+    def check_current(self):
+        source = self.current_path.read_bytes()
+        self.check_file(source)
+        self.arguments_check(source)
 
     def print_result(self):
-        sorted_files = sorted(self.result)
-        for file_name in sorted_files:
-            for line in self.result[file_name]:
-                print(f'{file_name}: Line {line[0]}: {line[1]} {self.issues[line[1]]}')
+        lines = []
+        for file_name in sorted(self.result):
+            for line_number, code in sorted(zip(*self.result[file_name])):
+                lines.append(f'{file_name}: Line {line_number}: {self._suffix[code]}\n')
+        sys.stdout.write(''.join(lines))
+
+
+def _find_py_files(dir_path, files):
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in _SKIP_DIRS:
+                    _find_py_files(entry.path, files)
+            elif entry.name.endswith('.py') and entry.is_file():
+                files.append(Path(entry.path))
+    return files
+
+
+def _analyze_one(file_path):
+    file_analyzer = CodeAnalyzer(file_path)
+    file_analyzer.check_one(file_path)
+    return file_path, file_analyzer.result[str(file_path)]
 
 
 def analyzer():
+    import argparse
     parser = argparse.ArgumentParser(description='Script takes path to file or '
                                                  'folder and tests it py files')
     parser.add_argument('path', type=str, help='path to folder of file name')